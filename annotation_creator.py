@@ -6,32 +6,98 @@ Purpose: Interactively create annotations in Nobl9 via the Annotations API.
 Supports creating annotations for projects, services, or individual SLOs with
 customizable descriptions and time ranges. Includes comprehensive logging.
 
-Dependencies: requests, toml, yaml, subprocess, sloctl CLI
+Dependencies: requests, toml (Python < 3.11 only), orjson (optional)
 Compatible with: macOS, Linux, and Windows
 
 Author: Jeremy Cooper
 Date Created: 2025-01-27
 """
 
+import atexit
 import base64
+import functools
+import hashlib
+import importlib.util
 import json
 import os
-import platform
-import shutil
-import subprocess
+import re
 import sys
+import threading
 import uuid
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import datetime
 from pathlib import Path
 
 import colorama
-import requests
-import toml
-import yaml
+
+# Prefer the stdlib TOML parser (Python 3.11+), then tomli, then toml
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None  # toml is imported in load_toml_config instead
+
+# orjson is optional; fall back to the stdlib json module when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Initialize colorama for cross-platform color support
 colorama.init()
 
+# Parsed TOML config keyed by (path, mtime_ns, size)
+_CONFIG_CACHE = {}
+
+# Shared HTTP session so annotation POSTs reuse pooled keep-alive connections
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+# Canonical RFC3339 UTC timestamp, e.g. 2025-01-27T10:00:00Z; ASCII digits only
+_RFC3339_UTC = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z', re.ASCII)
+
+# Any RFC3339 timestamp, with optional fractional seconds and a Z or numeric offset
+_RFC3339 = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})', re.ASCII)
+
+
+class _SanitizeTable(dict):
+    """str.translate table mapping any character outside [a-z0-9-] to a hyphen."""
+    
+    def __missing__(self, codepoint):
+        return '-'
+
+
+# Annotation name sanitization table (DNS-1123); allowed characters map to themselves
+_SANITIZE_TABLE = _SanitizeTable((ord(c), c) for c in 'abcdefghijklmnopqrstuvwxyz0123456789-')
+
+# Concurrent annotation POSTs in flight
+MAX_WORKERS = 16
+
+# Composite components listed before the preview is summarized
+COMPONENT_PREVIEW_LIMIT = 20
+
+# Seconds to wait on token and annotation requests
+REQUEST_TIMEOUT = 30
+
+# Serializes log file writes and console output across worker threads
+_LOG_LOCK = threading.Lock()
+
+# Open log file handles keyed by path, closed at interpreter exit
+_LOG_HANDLES = {}
+
+# Batch status line currently shown on the terminal, redrawn after other console output
+_PROGRESS_LINE = None
+
+# Access tokens are reused across runs until shortly before they expire
+TOKEN_CACHE_PATH = os.path.expanduser("~/.cache/nobl9/token.json")
+TOKEN_EXPIRY_MARGIN = 60  # seconds
+
+# Fetched SLO lists are reused for a few minutes unless --refresh is passed
+SLO_CACHE_DIR = os.path.expanduser("~/.cache/nobl9")
+SLO_CACHE_TTL = 300  # seconds
+
 
 def print_colored(text, color, end="\n"):
     """Print colored text to terminal."""
@@ -47,30 +113,137 @@ def setup_logging():
     return log_file
 
 
-def log_message(log_file, message, level="INFO"):
-    """Log message to file with timestamp."""
+def _close_log_handles():
+    """Flush and close any log files opened by log_message."""
+    for handle in _LOG_HANDLES.values():
+        try:
+            handle.close()
+        except Exception:
+            pass
+    _LOG_HANDLES.clear()
+
+
+atexit.register(_close_log_handles)
+
+
+def log_message(log_file, message, level="INFO", console=True):
+    """Log message to file with timestamp, echoing it to the terminal unless console is False."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {level}: {message}\n"
-    try:
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
-    except Exception as e:
-        print_colored(f"Warning: Could not write to log file: {e}", colorama.Fore.YELLOW)
-    if level == "ERROR":
-        print_colored(message, colorama.Fore.RED)
-    elif level == "WARNING":
-        print_colored(message, colorama.Fore.YELLOW)
-    elif level == "SUCCESS":
-        print_colored(message, colorama.Fore.GREEN)
-    else:
-        print_colored(message, colorama.Fore.CYAN)
+    with _LOG_LOCK:
+        try:
+            # Keep one buffered handle open per log file instead of reopening per line
+            handle = _LOG_HANDLES.get(log_file)
+            if handle is None:
+                handle = open(log_file, 'a', encoding='utf-8', buffering=8192)
+                _LOG_HANDLES[log_file] = handle
+            handle.write(log_entry)
+        except Exception as e:
+            print_colored(f"Warning: Could not write to log file: {e}", colorama.Fore.YELLOW)
+        if not console:
+            return
+        if _PROGRESS_LINE:
+            # Clear the status line so the message gets a line of its own
+            sys.stdout.write("\r\033[K")
+        if level == "ERROR":
+            print_colored(message, colorama.Fore.RED)
+        elif level == "WARNING":
+            print_colored(message, colorama.Fore.YELLOW)
+        elif level == "SUCCESS":
+            print_colored(message, colorama.Fore.GREEN)
+        else:
+            print_colored(message, colorama.Fore.CYAN)
+        if _PROGRESS_LINE:
+            sys.stdout.write(_PROGRESS_LINE)
+            sys.stdout.flush()
+
+
+def show_progress(text):
+    """Draw or update the single-line batch status; callers hold _LOG_LOCK."""
+    global _PROGRESS_LINE
+    _PROGRESS_LINE = text
+    sys.stdout.write(f"\r\033[K{text}")
+    sys.stdout.flush()
+
+
+def end_progress():
+    """Finish the batch status line so later output starts on a fresh line."""
+    global _PROGRESS_LINE
+    with _LOG_LOCK:
+        if _PROGRESS_LINE:
+            sys.stdout.write("\n")
+            _PROGRESS_LINE = None
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data):
+    """Serialize data to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+def get_session():
+    """Return the shared requests session, creating it on first use."""
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+    # The background warm-up may race the main thread to create the session
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            return _SESSION
+        # requests pulls in urllib3, certifi and charset detection; import only once needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        atexit.register(session.close)
+        # Publish only once fully configured, since readers skip the lock
+        _SESSION = session
+    return _SESSION
+
+
+def annotation_api_url(base_url, is_custom_instance):
+    """Return the Annotations API endpoint for the selected instance."""
+    return f"{base_url}/api/annotations" if is_custom_instance else "https://app.nobl9.com/api/annotations"
+
+
+def warm_up_connection(url):
+    """Open a pooled connection to url in the background while the user is typing."""
+    def _warm():
+        try:
+            # Any response will do; this only establishes DNS, TCP and TLS for the later POSTs
+            get_session().head(url, timeout=REQUEST_TIMEOUT)
+        except Exception:
+            pass
+    threading.Thread(target=_warm, daemon=True).start()
 
 
 def check_dependencies():
-    """Check if required dependencies are available."""
-    if not shutil.which("sloctl"):
-        print_colored("ERROR: 'sloctl' is not installed or not in PATH.", colorama.Fore.RED)
-        print_colored("You can install it from https://docs.nobl9.com/sloctl/", colorama.Fore.CYAN)
+    """Check if required Python packages are installed without importing them."""
+    required = ["requests"]
+    if tomllib is None:
+        required.append("toml")
+    missing = [name for name in required if importlib.util.find_spec(name) is None]
+    if missing:
+        print_colored(f"ERROR: Missing required Python packages: {', '.join(missing)}", colorama.Fore.RED)
+        print_colored(f"Install them with: pip3 install {' '.join(missing)}", colorama.Fore.CYAN)
         sys.exit(1)
 
 
@@ -81,7 +254,21 @@ def load_toml_config():
         print_colored(f"Config not found: {config_path}", colorama.Fore.RED)
         sys.exit(1)
     try:
-        config = toml.load(config_path)
+        # Reuse the parsed config while the file is unchanged on disk
+        st = os.stat(config_path)
+        cache_key = (config_path, st.st_mtime_ns, st.st_size)
+        if cache_key in _CONFIG_CACHE:
+            return _CONFIG_CACHE[cache_key]
+        # Read the whole file in one call, then parse from memory
+        with open(config_path, "rb") as f:
+            raw = f.read().decode("utf-8")
+        if tomllib is not None:
+            config = tomllib.loads(raw)
+        else:
+            import toml
+            config = toml.loads(raw)
+        _CONFIG_CACHE.clear()
+        _CONFIG_CACHE[cache_key] = config
         return config
     except Exception as e:
         print_colored(f"Error loading TOML config: {e}", colorama.Fore.RED)
@@ -113,16 +300,117 @@ def load_contexts_from_toml():
     return contexts
 
 
+@functools.lru_cache(maxsize=32)
+def decode_jwt_claims(token):
+    """Decode the JWT payload into a dict of claims (memoized per token)."""
+    try:
+        payload_b64 = token.split('.')[1]
+        # JWTs are base64url without padding; surplus '=' is ignored by the decoder
+        payload = json_loads(base64.urlsafe_b64decode(payload_b64 + '=='))
+        return payload if isinstance(payload, dict) else None
+    except Exception:
+        return None
+
+
 def decode_jwt_payload(token):
     """Decode JWT token to extract organization info."""
+    payload = decode_jwt_claims(token)
+    if not payload:
+        return None
+    return payload.get('m2mProfile', {}).get('organization', None)
+
+
+def _token_cache_key(client_id, base_url):
+    """Return the token cache entry key for a client and instance."""
+    return f"{client_id}@{base_url}"
+
+
+def load_cached_token(client_id, org, base_url):
+    """Return a cached access token that is still valid for at least a minute, or None."""
     try:
-        payload_b64 = token.split('.')[1]
-        payload_b64 += '=' * (-len(payload_b64) % 4)
-        payload_json = base64.b64decode(payload_b64).decode('utf-8')
-        payload = json.loads(payload_json)
-        return payload.get('m2mProfile', {}).get('organization', None)
+        with open(TOKEN_CACHE_PATH, "rb") as f:
+            cache = json_loads(f.read())
+        entry = cache.get(_token_cache_key(client_id, base_url))
     except Exception:
         return None
+    if not isinstance(entry, dict) or entry.get("org") != org:
+        return None
+    exp = entry.get("exp")
+    if not isinstance(exp, (int, float)) or exp - datetime.now().timestamp() <= TOKEN_EXPIRY_MARGIN:
+        return None
+    return entry.get("access_token")
+
+
+def write_private_file(path, data):
+    """Atomically replace path with data (bytes), readable only by the current user."""
+    import tempfile
+    
+    # mkstemp creates the file 0600 in the same directory, so os.replace is a same-filesystem rename
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_cached_token(client_id, org, base_url, access_token, log_file):
+    """Persist an access token and its expiry to the user-only token cache."""
+    claims = decode_jwt_claims(access_token) or {}
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    try:
+        with open(TOKEN_CACHE_PATH, "rb") as f:
+            cache = json_loads(f.read())
+        if not isinstance(cache, dict):
+            cache = {}
+    except Exception:
+        cache = {}
+    cache[_token_cache_key(client_id, base_url)] = {
+        "access_token": access_token,
+        "exp": exp,
+        "org": org,
+        "base_url": base_url
+    }
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), mode=0o700, exist_ok=True)
+        write_private_file(TOKEN_CACHE_PATH, json_dumps(cache))
+    except Exception as e:
+        log_message(log_file, f"Warning: Could not write token cache: {e}", "WARNING")
+
+
+def _slo_cache_path(org, base_url):
+    """Return the SLO cache file for an organization and instance."""
+    key = hashlib.sha1(f"{org}@{base_url}".encode()).hexdigest()[:16]
+    return os.path.join(SLO_CACHE_DIR, f"slos.{key}.json")
+
+
+def load_cached_slos(org, base_url):
+    """Return the cached SLO list if it was fetched within SLO_CACHE_TTL, or None."""
+    cache_path = _slo_cache_path(org, base_url)
+    try:
+        if datetime.now().timestamp() - os.stat(cache_path).st_mtime > SLO_CACHE_TTL:
+            return None
+        with open(cache_path, "rb") as f:
+            slos_data = json_loads(f.read())
+    except Exception:
+        return None
+    return slos_data if isinstance(slos_data, list) else None
+
+
+def save_cached_slos(org, base_url, raw, log_file):
+    """Write the raw SLO response body to the user-only SLO cache."""
+    try:
+        os.makedirs(SLO_CACHE_DIR, mode=0o700, exist_ok=True)
+        write_private_file(_slo_cache_path(org, base_url), raw)
+    except Exception as e:
+        log_message(log_file, f"Warning: Could not write SLO cache: {e}", "WARNING")
 
 
 def enhanced_choose_context():
@@ -143,14 +431,8 @@ def enhanced_choose_context():
                 continue
             choice_idx = int(choice) - 1
             if 0 <= choice_idx < len(contexts):
+                # The selected context is carried in memory; sloctl's own default is left untouched
                 selected_context = contexts[choice_idx]
-                result = subprocess.run(
-                    ["sloctl", "config", "use-context", selected_context["name"]],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode != 0:
-                    print_colored(f"Warning: Could not set sloctl context: {result.stderr}", colorama.Fore.YELLOW)
                 return selected_context["name"], selected_context
             else:
                 print_colored(f"Invalid choice. Please enter a number between 1 and {len(contexts)}.", colorama.Fore.RED)
@@ -161,8 +443,8 @@ def enhanced_choose_context():
             sys.exit(0)
 
 
-def get_token_from_credentials(credentials, log_file):
-    """Get access token using credentials with custom instance support."""
+def get_token_from_credentials(credentials, log_file, refresh=False):
+    """Get access token using credentials with custom instance support; refresh skips the token cache."""
     client_id = credentials["client_id"]
     client_secret = credentials["client_secret"]
     org = credentials["org"]
@@ -178,6 +460,12 @@ def get_token_from_credentials(credentials, log_file):
     if not org:
         log_message(log_file, "ERROR: Missing organization in context. Please check your TOML configuration.", "ERROR")
         sys.exit(1)
+    cached_token = None if refresh else load_cached_token(client_id, org, base_url)
+    if cached_token:
+        log_message(log_file, "✓ Reusing cached access token", "SUCCESS")
+        if is_custom_instance:
+            log_message(log_file, f"Instance: {base_url}", "INFO")
+        return cached_token, org, is_custom_instance, base_url
     auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
     headers = {
         "Accept": "application/json; version=v1alpha",
@@ -186,7 +474,7 @@ def get_token_from_credentials(credentials, log_file):
     }
     token_url = f"{base_url}/api/accessToken"
     log_message(log_file, f"Authenticating with {token_url}", "INFO")
-    resp = requests.post(token_url, headers=headers)
+    resp = get_session().post(token_url, headers=headers, timeout=REQUEST_TIMEOUT)
     if resp.status_code != 200:
         log_message(log_file, f"Failed to retrieve token. Status: {resp.status_code}", "ERROR")
         try:
@@ -200,7 +488,7 @@ def get_token_from_credentials(credentials, log_file):
             log_message(log_file, f"Response: {resp.text}", "ERROR")
         sys.exit(1)
     try:
-        token_data = resp.json()
+        token_data = json_loads(resp.content)
         if "access_token" not in token_data:
             log_message(log_file, f"No access_token in response: {token_data}", "ERROR")
             sys.exit(1)
@@ -208,35 +496,64 @@ def get_token_from_credentials(credentials, log_file):
         log_message(log_file, f"Invalid JSON response: {resp.text}", "ERROR")
         sys.exit(1)
     log_message(log_file, "✓ Access token acquired", "SUCCESS")
+    save_cached_token(client_id, org, base_url, token_data["access_token"], log_file)
     if is_custom_instance:
         log_message(log_file, f"Instance: {base_url}", "INFO")
     return token_data["access_token"], org, is_custom_instance, base_url
 
 
-def fetch_slo_data(log_file):
-    """Fetch SLO data from Nobl9."""
+def fetch_slo_data(access_token, org, is_custom_instance, base_url, log_file, refresh=False):
+    """Fetch SLO data for all projects directly from the Nobl9 API."""
+    if not refresh:
+        slos_data = load_cached_slos(org, base_url)
+        if slos_data is not None:
+            log_message(log_file, f"✓ Loaded {len(slos_data)} SLOs from cache (use --refresh to refetch)", "SUCCESS")
+            return slos_data
+    
+    import requests
+    
     log_message(log_file, "Fetching SLO data from Nobl9...", "INFO")
+    headers = {
+        "Accept": "application/json; version=v1alpha",
+        "Organization": org,
+        "Authorization": f"Bearer {access_token}",
+        "Project": "*"
+    }
+    api_url = f"{base_url}/api/get/slo" if is_custom_instance else "https://app.nobl9.com/api/get/slo"
     try:
-        result = subprocess.run(
-            ["sloctl", "get", "slos", "-A", "-o", "json"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        slos_json = result.stdout.strip()
-        slos_data = json.loads(slos_json)
-        if not isinstance(slos_data, list):
-            log_message(log_file, "ERROR: Invalid SLO data format.", "ERROR")
-            sys.exit(1)
-        log_message(log_file, f"✓ Retrieved {len(slos_data)} SLOs", "SUCCESS")
-        return slos_data
-    except subprocess.CalledProcessError as e:
+        resp = get_session().get(api_url, headers=headers, timeout=60)
+    except requests.exceptions.RequestException as e:
         log_message(log_file, f"ERROR: Failed to fetch SLO data: {e}", "ERROR")
         log_message(log_file, "Please check your Nobl9 configuration.", "INFO")
         sys.exit(1)
+    if resp.status_code != 200:
+        log_message(log_file, f"ERROR: Failed to fetch SLO data. Status: {resp.status_code}", "ERROR")
+        log_message(log_file, f"Response: {resp.text}", "ERROR")
+        sys.exit(1)
+    try:
+        slos_data = json_loads(resp.content)
     except json.JSONDecodeError as e:
         log_message(log_file, f"ERROR: Invalid JSON response: {e}", "ERROR")
         sys.exit(1)
+    if not isinstance(slos_data, list):
+        log_message(log_file, "ERROR: Invalid SLO data format.", "ERROR")
+        sys.exit(1)
+    # The API caps large result sets and flags it with a Truncated header
+    if "Truncated" in resp.headers:
+        log_message(log_file, f"WARNING: SLO list was truncated by the API (limit: {resp.headers['Truncated']})", "WARNING")
+    save_cached_slos(org, base_url, resp.content, log_file)
+    log_message(log_file, f"✓ Retrieved {len(slos_data)} SLOs", "SUCCESS")
+    return slos_data
+
+
+def ask(prompt):
+    """Prompt on stdout and read one line from stdin; raises EOFError when input is closed."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip('\n')
 
 
 def get_valid_input(prompt, field_name, log_file):
@@ -285,6 +602,44 @@ def get_annotation_name(prompt, log_file):
     #         return sanitized_name
 
 
+@functools.lru_cache(maxsize=128)
+def normalize_time(time_str):
+    """Validate a cleaned timestamp; return (normalized, None) or (None, warning message)."""
+    # Fast path for the canonical form; datetime() still rejects out-of-range fields
+    match = _RFC3339_UTC.fullmatch(time_str)
+    if match:
+        try:
+            datetime(*map(int, match.groups()))
+            return time_str, None
+        except ValueError:
+            return None, "Invalid time format. Please use ISO format (e.g., 2025-01-27T10:00:00Z)"
+    
+    # Check for the specific error pattern from the API
+    if '::' in time_str:
+        return None, "Invalid time format: double colon detected. Please use single colons only."
+    
+    is_utc = time_str.endswith('Z')
+    # Structural check first so only well-formed strings reach fromisoformat, which
+    # would otherwise accept date-only input or read a fourth ':NN' group as fractions
+    if not _RFC3339.fullmatch(time_str):
+        if is_utc and time_str.count(':') > 2:
+            return None, "Invalid time format: too many colons. Please use format: 2025-01-27T10:00:00Z"
+        if is_utc:
+            return None, "Invalid time format. Please use ISO format (e.g., 2025-01-27T10:00:00Z)"
+        return None, "Invalid time format. Please use ISO format with Z timezone (e.g., 2025-01-27T10:00:00Z)"
+    
+    # Single parse for both Z and explicit-offset inputs; also range-checks the fields
+    try:
+        dt = datetime.fromisoformat(time_str[:-1] + '+00:00' if is_utc else time_str)
+    except ValueError:
+        if is_utc:
+            return None, "Invalid time format. Please use ISO format (e.g., 2025-01-27T10:00:00Z)"
+        return None, "Invalid time format. Please use ISO format with Z timezone (e.g., 2025-01-27T10:00:00Z)"
+    
+    # Z inputs are normalized to RFC3339; other offsets are passed through as entered
+    return (dt.strftime('%Y-%m-%dT%H:%M:%SZ') if is_utc else time_str), None
+
+
 def get_time_input(prompt, log_file):
     """Get valid time input from user with improved validation and formatting."""
     while True:
@@ -293,35 +648,11 @@ def get_time_input(prompt, log_file):
         # Clean up common formatting issues
         time_str = time_str.replace(' ', '')  # Remove spaces
         
-        # Check for the specific error pattern from the API
-        if '::' in time_str:
-            log_message(log_file, "Invalid time format: double colon detected. Please use single colons only.", "WARNING")
+        normalized, warning = normalize_time(time_str)
+        if warning:
+            log_message(log_file, warning, "WARNING")
             continue
-        
-        # Handle various timezone formats
-        if time_str.endswith('Z'):
-            # Ensure proper RFC3339 format for Z timezone
-            if time_str.count(':') > 2:
-                log_message(log_file, "Invalid time format: too many colons. Please use format: 2025-01-27T10:00:00Z", "WARNING")
-                continue
-            
-            # Validate the format
-            try:
-                # Parse and reformat to ensure RFC3339 compliance
-                dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-                # Return in proper RFC3339 format
-                return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            except ValueError:
-                log_message(log_file, "Invalid time format. Please use ISO format (e.g., 2025-01-27T10:00:00Z)", "WARNING")
-                continue
-        else:
-            # Handle other timezone formats
-            try:
-                datetime.fromisoformat(time_str)
-                return time_str
-            except ValueError:
-                log_message(log_file, "Invalid time format. Please use ISO format with Z timezone (e.g., 2025-01-27T10:00:00Z)", "WARNING")
-                continue
+        return normalized
 
 
 def format_timestamp_example():
@@ -330,18 +661,18 @@ def format_timestamp_example():
     return now.strftime('%Y-%m-%dT%H:%M:%SZ')
 
 
+@functools.lru_cache(maxsize=1024)
 def sanitize_annotation_name(name):
     """Convert user input to a valid annotation name following DNS-1123 conventions."""
-    import re
-    
     # Convert to lowercase
     sanitized = name.lower()
     
     # Replace spaces, underscores, and other invalid characters with hyphens
-    sanitized = re.sub(r'[^a-z0-9-]', '-', sanitized)
+    sanitized = sanitized.translate(_SANITIZE_TABLE)
     
     # Remove multiple consecutive hyphens
-    sanitized = re.sub(r'-+', '-', sanitized)
+    while '--' in sanitized:
+        sanitized = sanitized.replace('--', '-')
     
     # Remove leading and trailing hyphens
     sanitized = sanitized.strip('-')
@@ -404,59 +735,99 @@ def get_annotation_details(log_file):
     return description, start_time, end_time
 
 
+def generate_annotation_uuids(count):
+    """Generate count version-4 UUID strings from a single os.urandom call."""
+    buf = os.urandom(16 * count)
+    # version=4 sets the RFC 4122 version and variant bits on each 16-byte slice
+    return [str(uuid.UUID(bytes=buf[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
 def create_annotations_for_slos(slos_list, description, start_time, end_time, 
                                access_token, org, is_custom_instance, base_url, log_file):
     """Create annotations for a list of SLOs with unique UUIDs for each."""
+    from concurrent.futures import ThreadPoolExecutor
+    
     success_count = 0
     total_count = len(slos_list)
     
     log_message(log_file, f"Creating annotations for {total_count} SLOs", "INFO")
     
-    for slo in slos_list:
+    # Request constants are identical for every SLO in the batch, so build them once
+    session = get_session()
+    api_url = annotation_api_url(base_url, is_custom_instance)
+    headers = {
+        "Accept": "application/json; version=v1alpha",
+        "Organization": org,
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    # Fields shared by every annotation in the batch; each worker copies it
+    template = {
+        "description": description,
+        "startTime": start_time,
+        "endTime": end_time
+    }
+    
+    # On a terminal, per-SLO lines go only to the log file and one status line updates in place;
+    # piped or redirected output keeps the per-SLO lines
+    show_status = sys.stdout.isatty()
+    done = [0]
+    
+    def _tick():
+        """Advance the terminal status line by one SLO."""
+        if show_status:
+            with _LOG_LOCK:
+                done[0] += 1
+                show_progress(f"  Creating annotations: {done[0]}/{total_count}")
+    
+    def _submit(slo, annotation_uuid):
+        """Build one SLO's annotation payload and POST it; returns True on success."""
         slo_name = slo.get('metadata', {}).get('name')
         slo_display_name = slo.get('metadata', {}).get('displayName', slo_name)
         slo_project = slo.get('metadata', {}).get('project')
+        if not (slo_name and slo_project):
+            # Skipped SLOs still count towards the status line so it reaches the total
+            log_message(log_file, f"⚠ Skipping SLO without a name or project: {slo_display_name or '(unnamed)'}", "WARNING")
+            _tick()
+            return False
         
-        if slo_name and slo_project:
-            # Generate unique UUID for each annotation
-            annotation_uuid = str(uuid.uuid4())
-            print_colored(f"Creating annotation {annotation_uuid} for SLO '{slo_display_name}'", colorama.Fore.CYAN)
-            
-            annotation_data = {
-                "name": annotation_uuid,
-                "description": description,
-                "startTime": start_time,
-                "endTime": end_time,
-                "project": slo_project,
-                "slo": slo_name,
-                "slo_display_name": slo_display_name  # Pass display name for logging
-            }
-            
-            if create_annotation(annotation_data, access_token, org, is_custom_instance, base_url, log_file):
-                success_count += 1
+        log_message(log_file, f"Creating annotation {annotation_uuid} for SLO '{slo_display_name}'", "INFO",
+                    console=not show_status)
+        
+        annotation_data = {
+            **template,
+            "name": annotation_uuid,
+            "project": slo_project,
+            "slo": slo_name
+        }
+        created = create_annotation(annotation_data, session, api_url, headers, log_file, slo_display_name,
+                                    console=not show_status)
+        _tick()
+        return created
+    
+    if slos_list:
+        # One entropy read for the whole batch instead of one per annotation
+        annotation_uuids = generate_annotation_uuids(total_count)
+        
+        # POSTs are independent and network-bound, so run them concurrently;
+        # map() keeps results in SLO order
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, total_count)) as executor:
+            success_count = sum(executor.map(_submit, slos_list, annotation_uuids))
+        end_progress()
     
     log_message(log_file, f"Annotation creation complete: {success_count}/{total_count} successful", "SUCCESS")
     return success_count, total_count
 
 
-def create_annotation(annotation_data, access_token, org, is_custom_instance, base_url, log_file):
-    """Create a single annotation via the Nobl9 API."""
-    headers = {
-        "Accept": "application/json; version=v1alpha",
-        "Organization": org,
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    
-    api_url = f"{base_url}/api/annotations" if is_custom_instance else "https://app.nobl9.com/api/annotations"
-    
+def create_annotation(annotation_data, session, api_url, headers, log_file, slo_display_name=None, console=True):
+    """Create a single annotation via the Nobl9 API; success lines are file-only when console is False."""
     try:
-        response = requests.post(api_url, headers=headers, json=annotation_data)
+        response = session.post(api_url, headers=headers, data=json_dumps(annotation_data), timeout=REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             # Use display name if available, otherwise fall back to internal name
-            slo_name_for_log = annotation_data.get('slo_display_name', annotation_data['slo'])
-            log_message(log_file, f"✓ Created annotation '{annotation_data['name']}' for SLO '{slo_name_for_log}'", "SUCCESS")
+            slo_name_for_log = slo_display_name or annotation_data['slo']
+            log_message(log_file, f"✓ Created annotation '{annotation_data['name']}' for SLO '{slo_name_for_log}'", "SUCCESS", console)
             return True
         elif response.status_code == 409:
             log_message(log_file, f"⚠ Annotation '{annotation_data['name']}' already exists for SLO '{annotation_data['slo']}'", "WARNING")
@@ -475,18 +846,44 @@ def create_annotation(annotation_data, access_token, org, is_custom_instance, ba
         return False
 
 
-def list_projects(slos_data, access_token, org, is_custom_instance, base_url, log_file):
+def build_slo_index(slos_data):
+    """Project SLOs to flat rows and group them by project and service in a single pass."""
+    rows = []
+    by_project = defaultdict(list)
+    by_service = defaultdict(list)
+    by_key = {}
+    display_names = {}
+    for slo in slos_data:
+        metadata = slo.get('metadata') or {}
+        spec = slo.get('spec') or {}
+        name = metadata.get('name')
+        project = metadata.get('project')
+        service = spec.get('service')
+        # (name, project, service, slo) tuples avoid repeated nested .get() chains
+        rows.append((name, project, service, slo))
+        # SLO names are unique within a project, so (project, name) identifies one SLO
+        by_key.setdefault((project, name), slo)
+        display_names.setdefault((project, name), metadata.get('displayName', name))
+        if project:
+            by_project[project].append(slo)
+        if service:
+            by_service[service].append(slo)
+    return {
+        "slos": slos_data,
+        "rows": rows,
+        "by_project": dict(by_project),
+        "by_service": dict(by_service),
+        "by_key": by_key,
+        "display_names": display_names
+    }
+
+
+def list_projects(slo_index, access_token, org, is_custom_instance, base_url, log_file):
     """List projects and create annotations for selected project."""
     log_message(log_file, "\nProjects:", "INFO")
     
-    # Extract unique projects
-    projects = {}
-    for slo in slos_data:
-        project = slo.get('metadata', {}).get('project')
-        if project:
-            if project not in projects:
-                projects[project] = []
-            projects[project].append(slo)
+    # Projects are grouped once in build_slo_index
+    projects = slo_index["by_project"]
     
     # Display projects with SLO counts
     project_list = list(projects.keys())
@@ -495,9 +892,11 @@ def list_projects(slos_data, access_token, org, is_custom_instance, base_url, lo
         print_colored("No projects found with SLOs.", colorama.Fore.YELLOW)
         return
     
-    for i, project in enumerate(project_list, 1):
-        count = len(projects[project])
-        print(f"  [{i}] {project} ({colorama.Fore.GREEN}{count}{colorama.Fore.RESET} SLOs)")
+    green, reset = colorama.Fore.GREEN, colorama.Fore.RESET
+    sys.stdout.write("".join(
+        f"  [{i}] {project} ({green}{len(projects[project])}{reset} SLOs)\n"
+        for i, project in enumerate(project_list, 1)
+    ))
     
     # Get user selection
     while True:
@@ -517,6 +916,7 @@ def list_projects(slos_data, access_token, org, is_custom_instance, base_url, lo
     log_message(log_file, f"Selected project: {selected_project}", "SUCCESS")
     
     # Get annotation details and create annotations
+    warm_up_connection(annotation_api_url(base_url, is_custom_instance))
     description, start_time, end_time = get_annotation_details(log_file)
     create_annotations_for_slos(
         projects[selected_project], description, start_time, end_time,
@@ -524,18 +924,12 @@ def list_projects(slos_data, access_token, org, is_custom_instance, base_url, lo
     )
 
 
-def list_services(slos_data, access_token, org, is_custom_instance, base_url, log_file):
+def list_services(slo_index, access_token, org, is_custom_instance, base_url, log_file):
     """List services and create annotations for selected service."""
     log_message(log_file, "\nServices:", "INFO")
     
-    # Extract unique services
-    services = {}
-    for slo in slos_data:
-        service = slo.get('spec', {}).get('service')
-        if service:
-            if service not in services:
-                services[service] = []
-            services[service].append(slo)
+    # Services are grouped once in build_slo_index
+    services = slo_index["by_service"]
     
     # Display services with SLO counts
     service_list = list(services.keys())
@@ -544,9 +938,11 @@ def list_services(slos_data, access_token, org, is_custom_instance, base_url, lo
         print_colored("No services found with SLOs.", colorama.Fore.YELLOW)
         return
     
-    for i, service in enumerate(service_list, 1):
-        count = len(services[service])
-        print(f"  [{i}] {service} ({colorama.Fore.GREEN}{count}{colorama.Fore.RESET} SLOs)")
+    green, reset = colorama.Fore.GREEN, colorama.Fore.RESET
+    sys.stdout.write("".join(
+        f"  [{i}] {service} ({green}{len(services[service])}{reset} SLOs)\n"
+        for i, service in enumerate(service_list, 1)
+    ))
     
     # Get user selection
     while True:
@@ -566,6 +962,7 @@ def list_services(slos_data, access_token, org, is_custom_instance, base_url, lo
     log_message(log_file, f"Selected service: {selected_service}", "SUCCESS")
     
     # Get annotation details and create annotations
+    warm_up_connection(annotation_api_url(base_url, is_custom_instance))
     description, start_time, end_time = get_annotation_details(log_file)
     create_annotations_for_slos(
         services[selected_service], description, start_time, end_time,
@@ -573,16 +970,17 @@ def list_services(slos_data, access_token, org, is_custom_instance, base_url, lo
     )
 
 
-def list_individual_slos(slos_data, access_token, org, is_custom_instance, base_url, log_file):
+def list_individual_slos(slo_index, access_token, org, is_custom_instance, base_url, log_file):
     """List individual SLOs and create annotations for selected ones."""
     log_message(log_file, "\nIndividual SLOs:", "INFO")
     
-    # Display SLOs with project and service info
-    for i, slo in enumerate(slos_data, 1):
-        slo_name = slo.get('metadata', {}).get('name', 'Unknown')
-        slo_project = slo.get('metadata', {}).get('project', 'Unknown')
-        slo_service = slo.get('spec', {}).get('service', 'Unknown')
-        print(f"  [{i}] {slo_name} (Project: {slo_project}, Service: {slo_service})")
+    rows = slo_index["rows"]
+    
+    # Display SLOs with project and service info in a single write
+    sys.stdout.write("".join(
+        f"  [{i}] {slo_name or 'Unknown'} (Project: {slo_project or 'Unknown'}, Service: {slo_service or 'Unknown'})\n"
+        for i, (slo_name, slo_project, slo_service, _) in enumerate(rows, 1)
+    ))
     
     # Get user selection
     print_colored("\nEnter SLO numbers separated by commas (e.g., 1,3,5): ", colorama.Fore.CYAN)
@@ -592,9 +990,9 @@ def list_individual_slos(slos_data, access_token, org, is_custom_instance, base_
             selected_indices = [int(x.strip()) - 1 for x in choice_input.split(',')]
             
             # Validate indices
-            valid_indices = [i for i in selected_indices if 0 <= i < len(slos_data)]
+            valid_indices = [i for i in selected_indices if 0 <= i < len(rows)]
             if valid_indices:
-                selected_slos = [slos_data[i] for i in valid_indices]
+                selected_slos = [rows[i][3] for i in valid_indices]
                 break
             else:
                 log_message(log_file, "Invalid SLO selection. Please try again.", "WARNING")
@@ -604,6 +1002,7 @@ def list_individual_slos(slos_data, access_token, org, is_custom_instance, base_
     log_message(log_file, f"Selected {len(selected_slos)} SLOs", "SUCCESS")
     
     # Get annotation details and create annotations
+    warm_up_connection(annotation_api_url(base_url, is_custom_instance))
     description, start_time, end_time = get_annotation_details(log_file)
     create_annotations_for_slos(
         selected_slos, description, start_time, end_time,
@@ -621,13 +1020,7 @@ def identify_composite_slos(slos_data):
         objectives = slo_spec.get('objectives', [])
         
         # Check if this is a composite SLO by looking for composite objectives
-        is_composite = False
-        for objective in objectives:
-            if objective.get('composite'):
-                is_composite = True
-                break
-        
-        if is_composite:
+        if any(objective.get('composite') for objective in objectives):
             composite_slos.append(slo)
         else:
             # This is a component SLO
@@ -656,77 +1049,85 @@ def extract_composite_components(composite_slo):
     return components
 
 
-def find_component_slos(slos_data, component_refs):
+def find_component_slos(slos_by_key, component_refs):
     """Find the actual SLO objects that match the component references."""
     found_slos = []
     
     for component_ref in component_refs:
-        target_project = component_ref.get('project')
-        target_slo_name = component_ref.get('slo')
-        
-        for slo in slos_data:
-            slo_project = slo.get('metadata', {}).get('project')
-            slo_name = slo.get('metadata', {}).get('name')
-            
-            if slo_project == target_project and slo_name == target_slo_name:
-                found_slos.append(slo)
-                break
+        # Direct (project, name) lookup instead of scanning every SLO per reference
+        slo = slos_by_key.get((component_ref.get('project'), component_ref.get('slo')))
+        if slo is not None:
+            found_slos.append(slo)
     
     return found_slos
 
 
-def list_composite_slos(slos_data, access_token, org, is_custom_instance, base_url, log_file):
+def get_composite_details(slo_index):
+    """Return composites with their component refs and resolved SLOs, computed on first use."""
+    composite_details = slo_index.get("composite_details")
+    if composite_details is None:
+        composite_slos, _ = identify_composite_slos(slo_index["slos"])
+        composite_details = []
+        for composite in composite_slos:
+            # Extract component references and find the actual SLO objects for them. A composite
+            # may list several objectives of one SLO; annotations are per SLO, so keep one ref each
+            unique_refs = {}
+            for ref in extract_composite_components(composite):
+                unique_refs.setdefault((ref.get('project'), ref.get('slo')), ref)
+            component_refs = list(unique_refs.values())
+            composite_details.append({
+                'composite': composite,
+                'component_refs': component_refs,
+                'actual_components': find_component_slos(slo_index["by_key"], component_refs)
+            })
+        # Cached on the index so re-entering the composite menu skips the scan
+        slo_index["composite_details"] = composite_details
+    return composite_details
+
+
+def list_composite_slos(slo_index, access_token, org, is_custom_instance, base_url, log_file):
     """List composite SLOs and create annotations for all their components."""
     log_message(log_file, "\nComposite SLOs:", "INFO")
     
-    # Identify composite SLOs
-    composite_slos, _ = identify_composite_slos(slos_data)
+    composite_details = get_composite_details(slo_index)
     
     # Log the findings for debugging
-    log_message(log_file, f"Found {len(composite_slos)} composite SLOs", "INFO")
+    log_message(log_file, f"Found {len(composite_details)} composite SLOs", "INFO")
     
-    if not composite_slos:
+    if not composite_details:
         print_colored("No composite SLOs found.", colorama.Fore.YELLOW)
         print_colored("Note: Composite SLOs are identified by having composite objectives.", colorama.Fore.CYAN)
         return
     
     # Display composite SLOs with their actual component counts
-    print_colored(f"\nFound {len(composite_slos)} composite SLO(s):", colorama.Fore.CYAN)
-    composite_details = []
+    print_colored(f"\nFound {len(composite_details)} composite SLO(s):", colorama.Fore.CYAN)
+    lines = []
+    green, white, yellow, cyan, reset = (colorama.Fore.GREEN, colorama.Fore.WHITE, colorama.Fore.YELLOW,
+                                         colorama.Fore.CYAN, colorama.Fore.RESET)
     
-    for i, composite in enumerate(composite_slos, 1):
+    for i, detail in enumerate(composite_details, 1):
+        composite = detail['composite']
         composite_display_name = composite.get('metadata', {}).get('displayName', 'Unknown')
         composite_name = composite.get('metadata', {}).get('name', 'Unknown')
         composite_project = composite.get('metadata', {}).get('project', 'Unknown')
-        
-        # Extract component references from this composite
-        component_refs = extract_composite_components(composite)
-        component_count = len(component_refs)
-        
-        # Find actual SLO objects for these components
-        actual_components = find_component_slos(slos_data, component_refs)
-        
-        composite_details.append({
-            'composite': composite,
-            'component_refs': component_refs,
-            'actual_components': actual_components
-        })
+        component_count = len(detail['component_refs'])
         
         # Use displayName as main identifier, with internal name in parentheses
         display_text = composite_display_name if composite_display_name != 'Unknown' else composite_name
-        print(f"  [{i}] {colorama.Fore.GREEN}{display_text}{colorama.Fore.RESET} ({colorama.Fore.WHITE}{composite_name}{colorama.Fore.RESET}, Project: {colorama.Fore.YELLOW}{composite_project}{colorama.Fore.RESET}, {colorama.Fore.CYAN}{component_count}{colorama.Fore.RESET} component SLOs)")
+        lines.append(f"  [{i}] {green}{display_text}{reset} ({white}{composite_name}{reset}, Project: {yellow}{composite_project}{reset}, {cyan}{component_count}{reset} component SLOs)\n")
+    sys.stdout.write("".join(lines))
     
     # Get user selection
     while True:
         try:
             choice = int(input("Select a composite SLO by number: "))
-            if 1 <= choice <= len(composite_slos):
+            if 1 <= choice <= len(composite_details):
                 selected_detail = composite_details[choice - 1]
                 selected_composite = selected_detail['composite']
                 selected_components = selected_detail['actual_components']
                 break
             else:
-                print_colored(f"Please enter a number between 1 and {len(composite_slos)}.", colorama.Fore.RED)
+                print_colored(f"Please enter a number between 1 and {len(composite_details)}.", colorama.Fore.RED)
         except ValueError:
             print_colored("Please enter a valid number.", colorama.Fore.RED)
         except KeyboardInterrupt:
@@ -742,43 +1143,61 @@ def list_composite_slos(slos_data, access_token, org, is_custom_instance, base_u
     print_colored(f"  • Composite SLO: {colorama.Fore.GREEN}{selected_composite_display_name}{colorama.Fore.RESET}", colorama.Fore.WHITE)
     print_colored(f"  • {len(selected_components)} component SLOs:", colorama.Fore.GREEN)
     
-    # Show the component details
-    for i, component_ref in enumerate(selected_detail['component_refs'], 1):
+    # Show the component details, capped so large composites don't flood the terminal
+    component_refs = selected_detail['component_refs']
+    display_names = slo_index["display_names"]
+    lines = []
+    for i, component_ref in enumerate(component_refs[:COMPONENT_PREVIEW_LIMIT], 1):
         project = component_ref.get('project', 'Unknown')
         slo_name = component_ref.get('slo', 'Unknown')
         
-        # Try to find the actual SLO object to get its displayName
-        slo_display_name = slo_name  # Default to the name if we can't find displayName
-        for slo in slos_data:
-            if (slo.get('metadata', {}).get('project') == project and 
-                slo.get('metadata', {}).get('name') == slo_name):
-                slo_display_name = slo.get('metadata', {}).get('displayName', slo_name)
-                break
+        # Default to the name if we can't find displayName
+        slo_display_name = display_names.get((project, slo_name), slo_name)
         
-        print(f"    {i}. {colorama.Fore.GREEN}{slo_display_name}{colorama.Fore.RESET} (Project: {colorama.Fore.YELLOW}{project}{colorama.Fore.RESET})")
+        lines.append(f"    {i}. {green}{slo_display_name}{reset} (Project: {yellow}{project}{reset})\n")
+    if len(component_refs) > COMPONENT_PREVIEW_LIMIT:
+        lines.append(f"{white}    ... and {len(component_refs) - COMPONENT_PREVIEW_LIMIT} more{reset}\n")
+    sys.stdout.write("".join(lines))
     
     # Get annotation details and create annotations
+    warm_up_connection(annotation_api_url(base_url, is_custom_instance))
     description, start_time, end_time = get_annotation_details(log_file)
     
-    # Create annotation for the composite SLO itself
-    print_colored(f"\nCreating annotation for composite SLO: {selected_composite_display_name}", colorama.Fore.CYAN)
+    # Composite and its components go out as one batch so they share the worker pool
+    if selected_components:
+        print_colored(f"\nCreating annotations for composite SLO '{selected_composite_display_name}' and {len(selected_components)} component SLOs", colorama.Fore.CYAN)
+    else:
+        print_colored(f"\nCreating annotation for composite SLO: {selected_composite_display_name}", colorama.Fore.CYAN)
     create_annotations_for_slos(
-        [selected_composite], description, start_time, end_time,
+        [selected_composite] + selected_components, description, start_time, end_time,
         access_token, org, is_custom_instance, base_url, log_file
     )
     
-    # Create annotations for the actual component SLOs
-    if selected_components:
-        print_colored(f"\nCreating annotations for {len(selected_components)} component SLOs", colorama.Fore.CYAN)
-        create_annotations_for_slos(
-            selected_components, description, start_time, end_time,
-            access_token, org, is_custom_instance, base_url, log_file
-        )
-    else:
+    if not selected_components:
         print_colored(f"\n⚠ Warning: Could not find actual SLO objects for the components", colorama.Fore.YELLOW)
         print_colored("   Only the composite SLO annotation was created.", colorama.Fore.YELLOW)
 
 
+# Main menu text, built once with its colors applied
+MENU_BANNER = (
+    f"{colorama.Fore.CYAN}\nMain Menu:{colorama.Fore.RESET}\n"
+    f"{colorama.Fore.YELLOW}Choose how to apply annotations:{colorama.Fore.RESET}\n"
+    "  [1] Apply to all SLOs in a Project\n"
+    "  [2] Apply to all SLOs in a Service\n"
+    "  [3] Apply to selected individual SLOs\n"
+    "  [4] Apply to Composite SLO and all its components\n"
+    "  [x] Exit\n"
+)
+
+# Main menu options; every handler takes (slo_index, access_token, org, is_custom_instance, base_url, log_file)
+MENU_HANDLERS = {
+    "1": list_projects,
+    "2": list_services,
+    "3": list_individual_slos,
+    "4": list_composite_slos
+}
+
+
 def main():
     """Main function."""
     print_colored("Nobl9 Annotation Creator", colorama.Fore.CYAN)
@@ -805,32 +1224,28 @@ def main():
     context_name, credentials = enhanced_choose_context()
     log_message(log_file, f"Selected context: {context_name}", "INFO")
     
-    access_token, org, is_custom_instance, base_url = get_token_from_credentials(credentials, log_file)
+    # --refresh bypasses both the cached token and the cached SLO list
+    refresh = "--refresh" in sys.argv[1:]
+    access_token, org, is_custom_instance, base_url = get_token_from_credentials(credentials, log_file, refresh)
     
     # Fetch SLO data
-    slos_data = fetch_slo_data(log_file)
+    slos_data = fetch_slo_data(access_token, org, is_custom_instance, base_url, log_file, refresh)
+    slo_index = build_slo_index(slos_data)
     
     # Main menu loop
     while True:
-        print_colored("\nMain Menu:", colorama.Fore.CYAN)
-        print_colored("Choose how to apply annotations:", colorama.Fore.YELLOW)
-        print("  [1] Apply to all SLOs in a Project")
-        print("  [2] Apply to all SLOs in a Service")
-        print("  [3] Apply to selected individual SLOs")
-        print("  [4] Apply to Composite SLO and all its components")
-        print("  [x] Exit")
+        sys.stdout.write(MENU_BANNER)
         
         try:
-            choice = input("Select an option: ").strip().lower()
+            try:
+                choice = ask("Select an option: ").strip().lower()
+            except EOFError:
+                # Closed stdin (e.g. piped input ran out) is treated as exit
+                choice = "x"
             
-            if choice == "1":
-                list_projects(slos_data, access_token, org, is_custom_instance, base_url, log_file)
-            elif choice == "2":
-                list_services(slos_data, access_token, org, is_custom_instance, base_url, log_file)
-            elif choice == "3":
-                list_individual_slos(slos_data, access_token, org, is_custom_instance, base_url, log_file)
-            elif choice == "4":
-                list_composite_slos(slos_data, access_token, org, is_custom_instance, base_url, log_file)
+            handler = MENU_HANDLERS.get(choice)
+            if handler:
+                handler(slo_index, access_token, org, is_custom_instance, base_url, log_file)
             elif choice == "x":
                 log_message(log_file, "Annotation Creator completed", "INFO")
                 print_colored("Goodbye!", colorama.Fore.CYAN)
@@ -4,53 +4,179 @@ Script name: get_annotations.py
 
 Purpose: Fetches and analyzes annotations from Nobl9 API. Retrieves annotation data including
 timestamps, types, descriptions, and associated SLOs. Supports filtering by time periods,
-annotation types, and offers export options in CSV, JSON, and Excel formats.
+annotation types, and offers export options in CSV, JSON, Excel, and Parquet formats.
 
-Dependencies: requests, pandas, openpyxl, toml, tabulate, sloctl CLI
+Dependencies: requests, openpyxl, toml (Python < 3.11 only), tabulate, orjson (optional), xlsxwriter (optional), pyarrow (optional)
 Compatible with: macOS and Linux
 
 Author: Jeremy Cooper
 Date Created: 2025-07-02
 """
 
+import atexit
 import base64
+import functools
+import hashlib
+import heapq
 import json
+import operator
 import os
 import re
-import shutil
-import subprocess
 import sys
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
-import requests
-import toml
-from colorama import Fore, Style, init
+if sys.stdout.isatty():
+    from colorama import Fore, Style, init
+    init(autoreset=True)
+else:
+    class _NoColor:
+        """Stand-in for colorama's Fore/Style that renders every color as an empty string."""
+        
+        def __getattr__(self, name):
+            return ""
+    
+    # Piped or redirected output gets plain text and colorama is never imported
+    Fore = Style = _NoColor()
+
+# Prefer the stdlib TOML parser (Python 3.11+), then tomli, then toml
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None  # toml is imported in _load_toml_cached instead
+
+# Parsed TOML config keyed by (path, mtime_ns, size)
+_CONFIG_CACHE = {}
+
+# orjson is optional; it makes large JSON responses and exports several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data):
+    """json.loads, via orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data):
+    """Compact JSON as UTF-8 bytes, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+# JSON object embedded in an error string returned by the auth or annotations API; greedy so
+# nested objects are captured whole, DOTALL so pretty-printed (multi-line) JSON matches too
+_JSON_OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
 
-init(autoreset=True)
+# Token endpoint of the default (non-custom) Nobl9 instance
+DEFAULT_AUTH_URL = "https://app.nobl9.com/api/accessToken"
+
+# Annotation responses are reused for a few minutes unless --refresh is passed
+ANNOTATION_CACHE_DIR = os.path.expanduser("~/.cache/nobl9")
+ANNOTATION_CACHE_TTL = 300  # seconds
+
+# Time windows longer than this are fetched as PARALLEL_FETCH_SHARDS concurrent sub-range requests
+PARALLEL_FETCH_MIN_WINDOW = timedelta(hours=24)
+PARALLEL_FETCH_SHARDS = 4
+
+# Shared HTTP session so authentication and annotation fetches reuse one keep-alive connection
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """Return the shared session; created once, under a lock, on first use."""
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            return _SESSION
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        atexit.register(session.close)
+        _SESSION = session  # published last, since the fast path above skips the lock
+    return _SESSION
+
+
+def warm_up_connection(url):
+    """HEAD url from a daemon thread so the pooled connection is open before authenticate needs it."""
+    def _warm():
+        try:
+            get_session().head(url, timeout=30)
+        except Exception:
+            pass
+    threading.Thread(target=_warm, daemon=True).start()
 
 
 def check_dependencies():
-    """Check if required dependencies are available."""
-    if not shutil.which("sloctl"):
-        print(f"{Fore.RED}ERROR: 'sloctl' is not installed or not in PATH.{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}You can install it from https://docs.nobl9.com/sloctl/{Style.RESET_ALL}")
+    """Check that required packages are installed without importing them."""
+    # find_spec only locates the modules; they are imported where first used
+    from importlib.util import find_spec
+    
+    required = ["requests", "tabulate"]
+    if tomllib is None:
+        required.append("toml")
+    missing = [name for name in required if find_spec(name) is None]
+    if missing:
+        print(f"{Fore.RED}ERROR: Missing required packages: {', '.join(missing)}{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}Install them with: pip3 install {' '.join(missing)}{Style.RESET_ALL}")
         sys.exit(1)
 
-# Decode JWT token to extract organization info
+# Decode JWT token to extract organization info; the result depends only on the token string
+@functools.lru_cache(maxsize=32)
 def decode_jwt_payload(token):
     """Decode JWT token to extract organization info."""
     try:
         # JWT has three parts: header.payload.signature
-        payload_b64 = token.split('.')[1]
+        payload_b64 = token.split('.', 2)[1]
         # Add padding if necessary
         payload_b64 += '=' * (-len(payload_b64) % 4)
-        payload_json = base64.b64decode(payload_b64).decode('utf-8')
-        payload = json.loads(payload_json)
+        # JWT segments are base64url-encoded ('-' and '_' instead of '+' and '/')
+        payload = json_loads(base64.urlsafe_b64decode(payload_b64))
         # Look for organization in m2mProfile
         return payload.get('m2mProfile', {}).get('organization', None)
     except Exception:
         return None
 
+def _load_toml_cached(path):
+    """Parse a TOML file, reusing the last result while its mtime and size are unchanged."""
+    st = os.stat(path)
+    cache_key = (path, st.st_mtime_ns, st.st_size)
+    if cache_key in _CONFIG_CACHE:
+        return _CONFIG_CACHE[cache_key]
+    if tomllib is not None:
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+    else:
+        import toml
+        config = toml.load(path)
+    _CONFIG_CACHE.clear()
+    _CONFIG_CACHE[cache_key] = config
+    return config
+
+
 def load_contexts_from_toml():
     """Load and parse TOML configuration."""
     default_toml_path = os.path.expanduser("~/.config/nobl9/config.toml")
@@ -70,7 +196,7 @@ def load_contexts_from_toml():
     else:
         toml_path = default_toml_path
     try:
-        toml_data = toml.load(toml_path)
+        toml_data = _load_toml_cached(toml_path)
         raw_contexts = toml_data.get("contexts", {})
         parsed_contexts = {}
         
@@ -124,28 +250,77 @@ def enhanced_choose_context():
 
 def validate_date_format(date_str):
     """Validate date format YYYY-MM-DD."""
-    if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+    # Cheap structural check first: zero-padded digits with dashes at positions 4 and 7
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        return False
+    digits = date_str[:4] + date_str[5:7] + date_str[8:]
+    if not (digits.isascii() and digits.isdigit()):
         return False
     try:
-        datetime.strptime(date_str, '%Y-%m-%d')
+        # Calendar check (e.g. rejects 2025-02-30) without strptime's format parsing
+        datetime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:]))
         return True
     except ValueError:
         return False
 
 
-def validate_timestamp_format(timestamp_str):
-    """Validate RFC3339 timestamp format."""
+def parse_timestamp(timestamp_str):
+    """Parse an RFC3339 timestamp to a naive UTC datetime; returns None if it is invalid."""
+    # Handle both with and without 'Z' suffix
+    if timestamp_str.endswith('Z'):
+        timestamp_str = timestamp_str[:-1]
     try:
-        # Handle both with and without 'Z' suffix
-        if timestamp_str.endswith('Z'):
-            timestamp_str = timestamp_str[:-1]
-        datetime.fromisoformat(timestamp_str)
-        return True
+        dt = datetime.fromisoformat(timestamp_str)
     except ValueError:
-        return False
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _print_api_error(response, headline):
+    """Print a failed API response, unpacking Nobl9 and Okta error details when present."""
+    print(f"{Fore.RED}ERROR: {headline}{Style.RESET_ALL}")
+    try:
+        error_data = json_loads(response.content)
+        if "error" in error_data:
+            error_info = error_data["error"]
+            # Check if error is a string (contains nested JSON) or a dict
+            if isinstance(error_info, str):
+                try:
+                    # Look for JSON object in the error string
+                    json_match = _JSON_OBJ_RE.search(error_info)
+                    if json_match:
+                        nested_error = json_loads(json_match.group())
+                        print(f"{Fore.RED}  Error Code: {nested_error.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
+                        print(f"{Fore.RED}  Summary: {nested_error.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
+                        print(f"{Fore.RED}  Error ID: {nested_error.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
+                        if nested_error.get('errorCauses'):
+                            print(f"{Fore.RED}  Causes: {nested_error['errorCauses']}{Style.RESET_ALL}")
+                    else:
+                        # If no JSON found, show the raw error string
+                        print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
+                except json.JSONDecodeError:
+                    # If nested parsing fails, show the raw error string
+                    print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
+            else:
+                # Error is already a dictionary
+                print(f"{Fore.RED}  Error Code: {error_info.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
+                print(f"{Fore.RED}  Summary: {error_info.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
+                print(f"{Fore.RED}  Error ID: {error_info.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
+                if error_info.get('errorCauses'):
+                    print(f"{Fore.RED}  Causes: {error_info['errorCauses']}{Style.RESET_ALL}")
+        elif "message" in error_data:
+            print(f"{Fore.RED}  Message: {error_data['message']}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}  Response: {response.text}{Style.RESET_ALL}")
+    except json.JSONDecodeError:
+        print(f"{Fore.RED}  Raw response: {response.text}{Style.RESET_ALL}")
+
 
 def authenticate(credentials):
     """Authenticate with Nobl9 API using credentials."""
+    import requests
+    
     client_id = credentials.get("clientId")
     client_secret = credentials.get("clientSecret")
     if not client_id or not client_secret:
@@ -188,50 +363,15 @@ def authenticate(credentials):
         # Use custom base URL for authentication
         auth_url = f"{base_url}/accessToken"
     else:
-        auth_url = "https://app.nobl9.com/api/accessToken"
+        auth_url = DEFAULT_AUTH_URL
     
     try:
-        response = requests.post(auth_url, headers=headers, timeout=30)
+        response = get_session().post(auth_url, headers=headers, timeout=30)
         if response.status_code != 200:
-            print(f"{Fore.RED}ERROR: Authentication failed{Style.RESET_ALL}")
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_info = error_data["error"]
-                    # Check if error is a string (contains nested JSON) or a dict
-                    if isinstance(error_info, str):
-                        try:
-                            # Look for JSON object in the error string
-                            json_match = re.search(r'\{.*\}', error_info)
-                            if json_match:
-                                nested_error = json.loads(json_match.group())
-                                print(f"{Fore.RED}  Error Code: {nested_error.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
-                                print(f"{Fore.RED}  Summary: {nested_error.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
-                                print(f"{Fore.RED}  Error ID: {nested_error.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
-                                if nested_error.get('errorCauses'):
-                                    print(f"{Fore.RED}  Causes: {nested_error['errorCauses']}{Style.RESET_ALL}")
-                            else:
-                                # If no JSON found, show the raw error string
-                                print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
-                        except json.JSONDecodeError:
-                            # If nested parsing fails, show the raw error string
-                            print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
-                    else:
-                        # Error is already a dictionary
-                        print(f"{Fore.RED}  Error Code: {error_info.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
-                        print(f"{Fore.RED}  Summary: {error_info.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
-                        print(f"{Fore.RED}  Error ID: {error_info.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
-                        if error_info.get('errorCauses'):
-                            print(f"{Fore.RED}  Causes: {error_info['errorCauses']}{Style.RESET_ALL}")
-                elif "message" in error_data:
-                    print(f"{Fore.RED}  Message: {error_data['message']}{Style.RESET_ALL}")
-                else:
-                    print(f"{Fore.RED}  Response: {response.text}{Style.RESET_ALL}")
-            except json.JSONDecodeError:
-                print(f"{Fore.RED}  Raw response: {response.text}{Style.RESET_ALL}")
+            _print_api_error(response, "Authentication failed")
             sys.exit(1)
         
-        token_data = response.json()
+        token_data = json_loads(response.content)
         token = token_data.get("access_token")
         if not token:
             print(f"{Fore.RED}ERROR: No access token in response{Style.RESET_ALL}")
@@ -249,9 +389,129 @@ def authenticate(credentials):
         print(f"  Response: {response.text}")
         sys.exit(1)
 
+_START_TIME = operator.itemgetter("startTime")
+
+
+def _start_time_key(annotation, _get=dict.get):
+    """Sort key for annotations; missing or null startTime sorts last."""
+    return _get(annotation, "startTime") or ""
+
+
+def sort_by_start_time(annotations):
+    """Sort annotations newest first, extracting keys in C when every startTime is set."""
+    try:
+        # KeyError here, or a None below, means the defaulting Python key is needed
+        fast = None not in map(_START_TIME, annotations)
+    except KeyError:
+        fast = False
+    annotations.sort(key=_START_TIME if fast else _start_time_key, reverse=True)
+
+
+def _annotation_cache_path(org, api_url, start_time, end_time):
+    """Return the annotation cache file for an organization, instance and time range."""
+    key = hashlib.sha1(f"{org}@{api_url}|{start_time}|{end_time}".encode()).hexdigest()[:16]
+    return os.path.join(ANNOTATION_CACHE_DIR, f"annotations.{key}.json")
+
+
+def load_cached_annotations(cache_path):
+    """Return the cached response body if it was written within ANNOTATION_CACHE_TTL, or None."""
+    try:
+        if datetime.now().timestamp() - os.stat(cache_path).st_mtime > ANNOTATION_CACHE_TTL:
+            return None
+        with open(cache_path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _prune_annotation_cache():
+    """Delete annotation cache files older than ANNOTATION_CACHE_TTL."""
+    now = datetime.now().timestamp()
+    for entry in os.scandir(ANNOTATION_CACHE_DIR):
+        if not (entry.name.startswith("annotations.") and entry.name.endswith(".json")):
+            continue
+        try:
+            if now - entry.stat().st_mtime > ANNOTATION_CACHE_TTL:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def write_private_file(path, data):
+    """Atomically replace path with data (bytes), readable only by the current user."""
+    import tempfile
+    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_cached_annotations(cache_path, raw):
+    """Write a raw annotations response body to the user-only cache, dropping expired entries."""
+    try:
+        os.makedirs(ANNOTATION_CACHE_DIR, mode=0o700, exist_ok=True)
+        _prune_annotation_cache()
+        write_private_file(cache_path, raw)
+    except OSError as e:
+        print(f"{Fore.YELLOW}Warning: Could not write annotation cache: {e}{Style.RESET_ALL}")
+
+
+def _get_annotations_response(api_base_url, headers, start_time, end_time):
+    """GET one time range of annotations; safe to call from worker threads, as it never prints or exits."""
+    return get_session().get(
+        api_base_url,
+        headers=headers,
+        params={"from": start_time, "to": end_time},
+        timeout=30
+    )
+
+
+def _response_body(response):
+    """Return the body of a successful response; prints the error and exits otherwise (main thread only)."""
+    if response.status_code != 200:
+        _print_api_error(response, f"API request failed (Status: {response.status_code})")
+        sys.exit(1)
+    return response.content
+
+
+def _parse_annotations(raw):
+    """Return the annotation list from a response body, which may be a list or an object."""
+    data = json_loads(raw)
+    
+    # Handle different response formats
+    if isinstance(data, list):
+        # API returned a list directly
+        return data
+    if isinstance(data, dict):
+        # API returned an object with annotations key
+        return data.get("annotations", [])
+    print(f"{Fore.RED}ERROR: Unexpected response format: {type(data)}{Style.RESET_ALL}")
+    sys.exit(1)
+
+
+def _split_time_range(start_time, end_time, start_dt, end_dt, shards):
+    """Split [start_time, end_time] into equal sub-ranges that share their boundaries."""
+    step = (end_dt - start_dt) / shards
+    bounds = [start_time]
+    # Inner boundaries use the plain YYYY-MM-DDThh:mm:ssZ form, without microseconds
+    bounds += [(start_dt + step * i).strftime("%Y-%m-%dT%H:%M:%SZ") for i in range(1, shards)]
+    bounds.append(end_time)
+    return list(zip(bounds, bounds[1:]))
+
+
 def fetch_annotations(token, org, start_time, end_time, is_custom_instance=False,
-                     custom_base_url=None):
-    """Fetch annotations from the Nobl9 API with time filtering."""
+                     custom_base_url=None, refresh=False, start_dt=None, end_dt=None):
+    """Fetch annotations from the Nobl9 API with time filtering; start_dt/end_dt skip re-parsing the strings."""
+    import requests
+    
     annotations = []
     
     # Use custom base URL for custom instances
@@ -261,14 +521,14 @@ def fetch_annotations(token, org, start_time, end_time, is_custom_instance=False
         api_base_url = "https://app.nobl9.com/api/annotations"
     
     # Add time range validation
-    try:
-        start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
-        end_dt = datetime.fromisoformat(end_time.replace('Z', ''))
-        if start_dt > end_dt:
-            print(f"{Fore.RED}ERROR: Start time is after end time{Style.RESET_ALL}")
+    if start_dt is None or end_dt is None:
+        start_dt = parse_timestamp(start_time)
+        end_dt = parse_timestamp(end_time)
+        if start_dt is None or end_dt is None:
+            print(f"{Fore.RED}ERROR: Invalid timestamp format: {start_time} to {end_time}{Style.RESET_ALL}")
             sys.exit(1)
-    except ValueError as e:
-        print(f"{Fore.RED}ERROR: Invalid timestamp format: {e}{Style.RESET_ALL}")
+    if start_dt > end_dt:
+        print(f"{Fore.RED}ERROR: Start time is after end time{Style.RESET_ALL}")
         sys.exit(1)
 
     headers = {
@@ -282,67 +542,48 @@ def fetch_annotations(token, org, start_time, end_time, is_custom_instance=False
     print(f"Time range: {start_time} to {end_time}")
     print("Progress:")
     
-    params = {
-        "from": start_time,
-        "to": end_time
-    }
+    # Windows that reach the present (the "past N" presets, today) are still filling up,
+    # so only ranges that ended in the past are cached
+    cache_path = None
+    if end_dt < datetime.utcnow():
+        cache_path = _annotation_cache_path(org, api_base_url, start_time, end_time)
+    raw = None if refresh or cache_path is None else load_cached_annotations(cache_path)
     
     try:
-        print(f"  Making API request...", end="", flush=True)
-        response = requests.get(
-            api_base_url,
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        if response.status_code != 200:
-            print(f"{Fore.RED}ERROR: API request failed (Status: {response.status_code}){Style.RESET_ALL}")
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_info = error_data["error"]
-                    # Check if error is a string (contains nested JSON) or a dict
-                    if isinstance(error_info, str):
-                        try:
-                            # Look for JSON object in the error string
-                            json_match = re.search(r'\{.*\}', error_info)
-                            if json_match:
-                                nested_error = json.loads(json_match.group())
-                                print(f"{Fore.RED}  Error Code: {nested_error.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
-                                print(f"{Fore.RED}  Summary: {nested_error.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
-                                print(f"{Fore.RED}  Error ID: {nested_error.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
-                            else:
-                                # If no JSON found, show the raw error string
-                                print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
-                        except json.JSONDecodeError:
-                            # If nested parsing fails, show the raw error string
-                            print(f"{Fore.RED}  Error: {error_info}{Style.RESET_ALL}")
-                    else:
-                        # Error is already a dictionary
-                        print(f"{Fore.RED}  Error Code: {error_info.get('errorCode', 'Unknown')}{Style.RESET_ALL}")
-                        print(f"{Fore.RED}  Summary: {error_info.get('errorSummary', 'No summary provided')}{Style.RESET_ALL}")
-                        print(f"{Fore.RED}  Error ID: {error_info.get('errorId', 'No ID provided')}{Style.RESET_ALL}")
-                elif "message" in error_data:
-                    print(f"{Fore.RED}  Message: {error_data['message']}{Style.RESET_ALL}")
-                else:
-                    print(f"{Fore.RED}  Response: {response.text}{Style.RESET_ALL}")
-            except json.JSONDecodeError:
-                print(f"{Fore.RED}  Raw response: {response.text}{Style.RESET_ALL}")
-            sys.exit(1)
-        
-        data = response.json()
-        
-        # Handle different response formats
-        if isinstance(data, list):
-            # API returned a list directly
-            annotations = data
-        elif isinstance(data, dict):
-            # API returned an object with annotations key
-            annotations = data.get("annotations", [])
+        if raw is not None:
+            print(f"  Using cached response (run with --refresh to refetch)...", end="", flush=True)
+            annotations = _parse_annotations(raw)
+        elif end_dt - start_dt <= PARALLEL_FETCH_MIN_WINDOW:
+            print(f"  Making API request...", end="", flush=True)
+            raw = _response_body(_get_annotations_response(api_base_url, headers, start_time, end_time))
+            annotations = _parse_annotations(raw)
+            if cache_path:
+                save_cached_annotations(cache_path, raw)
         else:
-            print(f"{Fore.RED}ERROR: Unexpected response format: {type(data)}{Style.RESET_ALL}")
-            sys.exit(1)
+            # Long windows are split into equal sub-ranges fetched concurrently on the shared session
+            from concurrent.futures import ThreadPoolExecutor
+            
+            ranges = _split_time_range(start_time, end_time, start_dt, end_dt, PARALLEL_FETCH_SHARDS)
+            print(f"  Making {len(ranges)} API requests...", end="", flush=True)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as ex:
+                responses = list(ex.map(
+                    lambda r: _get_annotations_response(api_base_url, headers, r[0], r[1]), ranges))
+            # Errors are reported once, here, after every shard has finished
+            bodies = [_response_body(response) for response in responses]
+            
+            # Annotations that overlap a sub-range boundary are returned by both neighbours
+            annotations = []
+            seen = set()
+            for body in bodies:
+                for annotation in _parse_annotations(body):
+                    key = (annotation.get("project"), annotation.get("name"))
+                    if key[1] is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    annotations.append(annotation)
+            if cache_path:
+                save_cached_annotations(cache_path, json_dumps(annotations))
         
         print(f" {Fore.GREEN}Found {len(annotations)} annotations{Style.RESET_ALL}")
         
@@ -359,13 +600,22 @@ def fetch_annotations(token, org, start_time, end_time, is_custom_instance=False
     print(f"Annotation collection complete!{Style.RESET_ALL}")
     print(f"Total annotations retrieved: {len(annotations)}")
     
-    # Sort annotations by timestamp
-    annotations.sort(key=lambda x: x.get("startTime", ""), reverse=True)
+    # Sort annotations by timestamp; RFC3339 strings in one format sort chronologically as text
+    sort_by_start_time(annotations)
     
     return annotations
 
+# Menu choices 1-4 of select_time_period: windows ending now
+PERIOD_LENGTHS = {
+    1: timedelta(hours=24),
+    2: timedelta(days=7),
+    3: timedelta(days=14),
+    4: timedelta(days=30)
+}
+
+
 def select_time_period():
-    """Allow user to select time period for annotation filtering."""
+    """Allow user to select time period; returns the RFC3339 strings and matching naive UTC datetimes."""
     while True:
         print(f"\n{Fore.CYAN}Select time period:{Style.RESET_ALL}")
         print("  [1] Past 24 hours")
@@ -384,36 +634,24 @@ def select_time_period():
             choice = int(choice)
             now = datetime.utcnow()
             
-            if choice == 1:
-                start_time = (now - timedelta(hours=24)).isoformat() + "Z"
-                end_time = now.isoformat() + "Z"
-                return start_time, end_time
-            elif choice == 2:
-                start_time = (now - timedelta(days=7)).isoformat() + "Z"
-                end_time = now.isoformat() + "Z"
-                return start_time, end_time
-            elif choice == 3:
-                start_time = (now - timedelta(days=14)).isoformat() + "Z"
-                end_time = now.isoformat() + "Z"
-                return start_time, end_time
-            elif choice == 4:
-                start_time = (now - timedelta(days=30)).isoformat() + "Z"
-                end_time = now.isoformat() + "Z"
-                return start_time, end_time
+            if choice in PERIOD_LENGTHS:
+                start_dt = now - PERIOD_LENGTHS[choice]
+                return start_dt.isoformat() + "Z", now.isoformat() + "Z", start_dt, now
             elif choice == 5:
                 while True:
                     day = input(f"{Fore.CYAN}Enter date (YYYY-MM-DD):{Style.RESET_ALL} ").strip()
                     if validate_date_format(day):
-                        start_time = f"{day}T00:00:00Z"
-                        end_time = f"{day}T23:59:59Z"
-                        return start_time, end_time
+                        start_dt = datetime.fromisoformat(day)
+                        end_dt = start_dt + timedelta(hours=23, minutes=59, seconds=59)
+                        return f"{day}T00:00:00Z", f"{day}T23:59:59Z", start_dt, end_dt
                     else:
                         print(f"{Fore.RED}ERROR: Invalid date format. Please use YYYY-MM-DD{Style.RESET_ALL}")
             elif choice == 6:
                 while True:
                     start_time = input(f"{Fore.CYAN}Enter start time (YYYY-MM-DDThh:mm:ssZ):{Style.RESET_ALL} "
                                      f"").strip()
-                    if validate_timestamp_format(start_time):
+                    start_dt = parse_timestamp(start_time)
+                    if start_dt is not None:
                         break
                     else:
                         print(f"{Fore.RED}ERROR: Invalid start time format. "
@@ -422,13 +660,14 @@ def select_time_period():
                 while True:
                     end_time = input(f"{Fore.CYAN}Enter end time (YYYY-MM-DDThh:mm:ssZ):{Style.RESET_ALL} "
                                    f"").strip()
-                    if validate_timestamp_format(end_time):
+                    end_dt = parse_timestamp(end_time)
+                    if end_dt is not None:
                         break
                     else:
                         print(f"{Fore.RED}ERROR: Invalid end time format. "
                               f"{Fore.RED}Please use YYYY-MM-DDThh:mm:ssZ{Style.RESET_ALL}")
                 
-                return start_time, end_time
+                return start_time, end_time, start_dt, end_dt
             else:
                 print(f"{Fore.RED}ERROR: Invalid choice. Please enter a number between 1 and 6.{Style.RESET_ALL}")
                 continue
@@ -439,12 +678,22 @@ def select_time_period():
             print(f"\n{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
             sys.exit(0)
 
-def analyze_annotation_types(annotations):
+def bucket_annotation_types(annotations):
+    """Group annotation positions by category in one pass, keeping the fetched order."""
+    buckets = {}
+    for i, annotation in enumerate(annotations):
+        category = annotation.get("category", "Unknown")
+        bucket = buckets.get(category)
+        if bucket is None:
+            buckets[category] = [i]
+        else:
+            bucket.append(i)
+    return buckets
+
+
+def analyze_annotation_types(buckets):
     """Analyze and display annotation types found."""
-    type_counts = {}
-    for annotation in annotations:
-        annotation_type = annotation.get("category", "Unknown")
-        type_counts[annotation_type] = type_counts.get(annotation_type, 0) + 1
+    type_counts = {annotation_type: len(positions) for annotation_type, positions in buckets.items()}
     
     print(f"\n{Fore.CYAN}Annotation Types Found:{Style.RESET_ALL}")
     for annotation_type, count in sorted(type_counts.items()):
@@ -464,120 +713,259 @@ def select_annotation_types(available_types):
             print(f"  [{i}] {annotation_type} ({count} annotations)")
         print("  Or enter multiple numbers (comma-separated, e.g., 1,3,5)")
         
-        try:
-            choice = input(f"{Fore.CYAN}Enter choice:{Style.RESET_ALL} ").strip()
-            
-            # Handle "0" for all types
-            if choice == "0":
-                return set(type_list)  # Return all types
+        choice = input(f"{Fore.CYAN}Enter choice:{Style.RESET_ALL} ").strip()
+        
+        # Handle "0" for all types
+        if choice == "0":
+            return set(type_list)  # Return all types
+        
+        # Handle comma-separated numbers
+        if "," in choice:
+            selected_numbers = [num.strip() for num in choice.split(",") 
+                             if num.strip()]
+            selected_types = set()
+            has_zero = False
             
-            # Handle comma-separated numbers
-            if "," in choice:
-                selected_numbers = [num.strip() for num in choice.split(",") 
-                                 if num.strip()]
-                selected_types = set()
-                has_zero = False
-                
-                for num_str in selected_numbers:
-                    try:
-                        num = int(num_str)
-                        if num == 0:
-                            has_zero = True
-                        elif 1 <= num <= len(type_list):
-                            selected_types.add(type_list[num-1])
-                        else:
-                            print(f"{Fore.RED}ERROR: Invalid number {num}. "
-                                  f"{Fore.RED}Must be between 0 and {len(type_list)}{Style.RESET_ALL}")
-                            continue
-                    except ValueError:
-                        print(f"{Fore.RED}ERROR: Invalid input '{num_str}'. Must be a number.{Style.RESET_ALL}")
+            for num_str in selected_numbers:
+                try:
+                    num = int(num_str)
+                    if num == 0:
+                        has_zero = True
+                    elif 1 <= num <= len(type_list):
+                        selected_types.add(type_list[num-1])
+                    else:
+                        print(f"{Fore.RED}ERROR: Invalid number {num}. "
+                              f"{Fore.RED}Must be between 0 and {len(type_list)}{Style.RESET_ALL}")
                         continue
-                
-                # If 0 is included, return all types (ignore other numbers)
-                if has_zero:
-                    print(f"{Fore.YELLOW}Note: '0' (all types) selected - ignoring other numbers{Style.RESET_ALL}")
-                    return set(type_list)
-                
-                if selected_types:
-                    return selected_types
-                else:
-                    print(f"{Fore.RED}ERROR: No valid types selected.{Style.RESET_ALL}")
+                except ValueError:
+                    print(f"{Fore.RED}ERROR: Invalid input '{num_str}'. Must be a number.{Style.RESET_ALL}")
                     continue
             
-            # Handle single number
-            try:
-                choice_num = int(choice)
-                if 1 <= choice_num <= len(type_list):
-                    return {type_list[choice_num-1]}  # Return selected type
-                else:
-                    print(f"{Fore.RED}ERROR: Invalid choice. Please enter a number between "
-                          f"{Fore.RED}0 and {len(type_list)}, or comma-separated numbers.{Style.RESET_ALL}")
-                    continue
-            except ValueError:
-                print(f"{Fore.RED}ERROR: Invalid input. Please enter a number or "
-                      f"{Fore.RED}comma-separated numbers.{Style.RESET_ALL}")
+            # If 0 is included, return all types (ignore other numbers)
+            if has_zero:
+                print(f"{Fore.YELLOW}Note: '0' (all types) selected - ignoring other numbers{Style.RESET_ALL}")
+                return set(type_list)
+            
+            if selected_types:
+                return selected_types
+            else:
+                print(f"{Fore.RED}ERROR: No valid types selected.{Style.RESET_ALL}")
                 continue
-        except KeyboardInterrupt:
-            print(f"\n{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
-            sys.exit(0)
+        
+        # Handle single number
+        try:
+            choice_num = int(choice)
+            if 1 <= choice_num <= len(type_list):
+                return {type_list[choice_num-1]}  # Return selected type
+            else:
+                print(f"{Fore.RED}ERROR: Invalid choice. Please enter a number between "
+                      f"{Fore.RED}0 and {len(type_list)}, or comma-separated numbers.{Style.RESET_ALL}")
+                continue
+        except ValueError:
+            print(f"{Fore.RED}ERROR: Invalid input. Please enter a number or "
+                  f"{Fore.RED}comma-separated numbers.{Style.RESET_ALL}")
+            continue
 
+@functools.lru_cache(maxsize=4096)
 def format_timestamp(iso_string):
     """Format ISO timestamp for display."""
     try:
+        # Fixed-layout YYYY-MM-DDTHH:MM:SSZ strings are rearranged by slicing instead of strptime
+        if (len(iso_string) == 20 and iso_string[4] == '-' and iso_string[7] == '-'
+                and iso_string[10] == 'T' and iso_string[13] == ':' and iso_string[19] == 'Z'):
+            return f"{iso_string[5:7]}/{iso_string[8:10]}/{iso_string[2:4]} {iso_string[11:16]}"
         dt = datetime.strptime(iso_string, "%Y-%m-%dT%H:%M:%SZ")
         return dt.strftime("%m/%d/%y %H:%M")
     except Exception:
         return iso_string
 
 
-def extract_slo_and_project_names(annotation):
-    """Extract SLO and project names from annotation (top-level fields)."""
-    slo = annotation.get("slo")
-    project = annotation.get("project")
-    slo_names = [slo] if slo else []
-    project_names = [project] if project else []
-    return (", ".join(slo_names) if slo_names else "None",
-            ", ".join(project_names) if project_names else "None")
+# Annotation fields copied into each export row, in EXPORT_COLUMNS order
+_ROW_FIELDS = operator.itemgetter("startTime", "endTime", "category", "name",
+                                  "description", "slo", "project")
 
-def display_annotations(annotations, selected_types):
-    """Display annotations in a formatted table."""
-    from tabulate import tabulate
+
+def _row_fields(annotation):
+    """Return the row fields of an annotation, defaulting any that are missing."""
+    try:
+        return _ROW_FIELDS(annotation)
+    except KeyError:
+        get = annotation.get
+        return (get("startTime", ""), get("endTime", ""), get("category", ""),
+                get("name", ""), get("description", ""), get("slo"), get("project"))
+
+
+def build_rows(annotations):
+    """Flatten annotations into export rows once, in the same order as the input."""
+    rows = []
+    append = rows.append
+    for annotation in annotations:
+        start, end, category, name, description, slo, project = _row_fields(annotation)
+        append({
+            "StartTime": start,
+            "EndTime": end,
+            "Type": category,
+            "Name": name,
+            "Description": description,
+            # SLO and project are single top-level fields on each annotation
+            "SLOs": slo or "None",
+            "Projects": project or "None"
+        })
+    return rows
+
+# Columns of the on-screen table, and how many rows it shows before truncating
+DISPLAY_HEADERS = ("Time", "Type", "Description", "SLOs", "Projects")
+DISPLAY_ROW_LIMIT = 200
+
+# Number of distinct type selections whose filtered results are kept for reuse
+FILTER_CACHE_SIZE = 16
+
+
+def filter_annotations(annotations, rows, buckets, selected_types, cache=None):
+    """Return the annotations and rows of the selected types, reusing earlier selections from cache."""
+    key = frozenset(selected_types)
+    if cache is not None and key in cache:
+        cache.move_to_end(key)
+        return cache[key]
     
-    # Filter annotations by selected types
-    filtered_annotations = [
-        ann for ann in annotations 
-        if ann.get("category", "Unknown") in selected_types
-    ]
+    # Merge the selected types' position lists so the result keeps the fetched (newest-first) order
+    positions = list(heapq.merge(*(buckets.get(t, ()) for t in selected_types)))
+    result = ([annotations[i] for i in positions], [rows[i] for i in positions])
+    
+    if cache is not None:
+        cache[key] = result
+        if len(cache) > FILTER_CACHE_SIZE:
+            cache.popitem(last=False)
+    return result
+
+
+def display_annotations(filtered_annotations, filtered_rows, selected_types):
+    """Display annotations in a formatted table; returns the matching annotations and rows."""
+    from tabulate import tabulate
     
     if not filtered_annotations:
         print(f"\n{Fore.YELLOW}No annotations found for selected types: "
               f"{', '.join(selected_types)}{Style.RESET_ALL}")
-        return
+        return [], []
     
-    # Format annotations for display
-    rows = []
-    for annotation in filtered_annotations:
-        slos_display, projects_display = extract_slo_and_project_names(annotation)
-        description = annotation.get("description", "")
+    # Format at most DISPLAY_ROW_LIMIT annotations for display; exports still get every row
+    table = []
+    for row in filtered_rows[:DISPLAY_ROW_LIMIT]:
+        description = row["Description"]
         if len(description) > 50:
             description = description[:50] + "..."
         
-        rows.append({
-            "Time": format_timestamp(annotation.get("startTime", "")),
-            "Type": annotation.get("category", ""),
-            "Description": description,
-            "SLOs": slos_display if slos_display else "None",
-            "Projects": projects_display if projects_display else "None"
-        })
+        table.append((format_timestamp(row["StartTime"]), row["Type"], description,
+                      row["SLOs"], row["Projects"]))
 
     print(f"\n{Fore.CYAN}Annotation Table ({len(filtered_annotations)} annotations):{Style.RESET_ALL}")
-    print(tabulate(rows, headers="keys", tablefmt="simple"))
+    print(tabulate(table, headers=DISPLAY_HEADERS, tablefmt="simple"))
+    hidden = len(filtered_rows) - len(table)
+    if hidden > 0:
+        print(f"{Fore.YELLOW}...and {hidden} more; export to see all annotations.{Style.RESET_ALL}")
     
-    return filtered_annotations
+    return filtered_annotations, filtered_rows
+
+# Column order for the flat CSV and Excel exports
+EXPORT_COLUMNS = ["StartTime", "EndTime", "Type", "Name", "Description", "SLOs", "Projects"]
+
+# CSV and Excel exports larger than this are split into numbered part files
+SEGMENT_SIZE = 250000
+
+# The JSON export serializes this many annotations at a time
+EXPORT_BATCH_SIZE = 1000
 
-def export_annotations(annotations, context, export_format):
-    """Export annotations to various formats."""
-    import pandas as pd
+
+def write_segmented(base, extension, rows, write_file):
+    """Write rows to base.extension, or to base_partNNN.extension files of SEGMENT_SIZE rows each."""
+    if len(rows) <= SEGMENT_SIZE:
+        path = f"{base}.{extension}"
+        write_file(path, rows)
+        return [path]
+    paths = []
+    for part, start in enumerate(range(0, len(rows), SEGMENT_SIZE), 1):
+        path = f"{base}_part{part:03d}.{extension}"
+        write_file(path, rows[start:start + SEGMENT_SIZE])
+        paths.append(path)
+    return paths
+
+
+def write_csv(path, rows):
+    """Write rows to a CSV file with an EXPORT_COLUMNS header."""
+    # Rows are plain dicts, so the stdlib writer takes them without a DataFrame
+    import csv
+    
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        # "\n" line endings, as the earlier pandas to_csv export wrote
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(path, annotations):
+    """Write annotations as an indented JSON array, serializing EXPORT_BATCH_SIZE at a time."""
+    if orjson is not None:
+        def dump_batch(batch):
+            return orjson.dumps(batch, option=orjson.OPT_INDENT_2)
+    else:
+        def dump_batch(batch):
+            return json.dumps(batch, indent=2).encode("utf-8")
+    
+    if not annotations:
+        with open(path, "wb") as f:
+            f.write(b"[]")
+        return
+    
+    # Each batch is dumped as its own array and the brackets are stripped, so the file matches
+    # a single dump of the whole list while only one batch is ever held as serialized bytes
+    with open(path, "wb") as f:
+        f.write(b"[\n")
+        for start in range(0, len(annotations), EXPORT_BATCH_SIZE):
+            if start:
+                f.write(b",\n")
+            f.write(dump_batch(annotations[start:start + EXPORT_BATCH_SIZE])[2:-2])
+        f.write(b"\n]")
+
+
+def write_xlsx(path, rows):
+    """Write rows to a single-sheet workbook, streaming rows instead of holding the sheet in memory."""
+    try:
+        import xlsxwriter
+    except ImportError:
+        xlsxwriter = None
+    
+    if xlsxwriter is not None:
+        # constant_memory flushes each row as it is written; cell text is kept as plain strings
+        workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False
+        })
+        worksheet = workbook.add_worksheet("Sheet1")
+        worksheet.write_row(0, 0, EXPORT_COLUMNS)
+        for i, row in enumerate(rows, 1):
+            worksheet.write_row(i, 0, [row[column] for column in EXPORT_COLUMNS])
+        workbook.close()
+        return
+    
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Sheet1")
+    worksheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        worksheet.append([row[column] for column in EXPORT_COLUMNS])
+    workbook.save(path)
+
+
+def export_annotations(annotations, rows, context, export_format, total=None, selected_types=None):
+    """Export the filtered annotations (out of total fetched) to various formats; CSV and Excel use the prebuilt rows."""
+    # Only the filtered selection may be written; refuse anything else rather than export it
+    if (len(rows) != len(annotations)
+            or (total is not None and len(annotations) > total)
+            or (selected_types is not None
+                and any(a.get("category", "Unknown") not in selected_types for a in annotations))):
+        print(f"{Fore.RED}ERROR: Export data does not match the selected annotation types; nothing was exported{Style.RESET_ALL}")
+        return
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
     base = f"export_annotations/annotations_{context}_{timestamp}"
@@ -592,57 +980,70 @@ def export_annotations(annotations, context, export_format):
         print(f"{Fore.RED}ERROR: Failed to create export directory: {e}{Style.RESET_ALL}")
         return
     
+    if total is not None:
+        print(f"{Fore.CYAN}Exporting {len(annotations)}/{total} annotations...{Style.RESET_ALL}")
+    
     if export_format == "1":  # CSV
-        # Create simplified table for CSV
-        rows = []
-        for annotation in annotations:
-            slos_str, projects_str = extract_slo_and_project_names(annotation)
-            rows.append({
-                "StartTime": annotation.get("startTime", ""),
-                "EndTime": annotation.get("endTime", ""),
-                "Type": annotation.get("category", ""),
-                "Name": annotation.get("name", ""),
-                "Description": annotation.get("description", ""),
-                "SLOs": slos_str,
-                "Projects": projects_str
-            })
-        
         try:
-            df = pd.DataFrame(rows)
-            df.to_csv(f"{base}.csv", index=False)
-            print(f"{Fore.GREEN}Exported to {base}.csv{Style.RESET_ALL}")
+            for path in write_segmented(base, "csv", rows, write_csv):
+                print(f"{Fore.GREEN}Exported to {path}{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}ERROR: Failed to export CSV: {e}{Style.RESET_ALL}")
         
     elif export_format == "2":  # JSON (full details)
         try:
-            with open(f"{base}.json", "w") as f:
-                json.dump(annotations, f, indent=2)
+            write_json(f"{base}.json", annotations)
             print(f"{Fore.GREEN}Exported to {base}.json{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}ERROR: Failed to export JSON: {e}{Style.RESET_ALL}")
         
     elif export_format == "3":  # Excel
-        # Create simplified table for Excel
-        rows = []
-        for annotation in annotations:
-            slos_str, projects_str = extract_slo_and_project_names(annotation)
-            rows.append({
-                "StartTime": annotation.get("startTime", ""),
-                "EndTime": annotation.get("endTime", ""),
-                "Type": annotation.get("category", ""),
-                "Name": annotation.get("name", ""),
-                "Description": annotation.get("description", ""),
-                "SLOs": slos_str,
-                "Projects": projects_str
-            })
-        
         try:
-            df = pd.DataFrame(rows)
-            df.to_excel(f"{base}.xlsx", index=False)
-            print(f"{Fore.GREEN}Exported to {base}.xlsx{Style.RESET_ALL}")
+            for path in write_segmented(base, "xlsx", rows, write_xlsx):
+                print(f"{Fore.GREEN}Exported to {path}{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}ERROR: Failed to export Excel: {e}{Style.RESET_ALL}")
+        
+    elif export_format == "4":  # Parquet
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print(f"{Fore.RED}ERROR: Parquet export requires pyarrow (pip3 install pyarrow){Style.RESET_ALL}")
+            return
+        try:
+            # Columnar layout; the writer dictionary-encodes repeated Type/SLO/Project values
+            table = pa.Table.from_pylist(rows, schema=pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS]))
+            pq.write_table(table, f"{base}.parquet", compression="zstd")
+            print(f"{Fore.GREEN}Exported to {base}.parquet{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}ERROR: Failed to export Parquet: {e}{Style.RESET_ALL}")
+
+# Menu and messages of the type-selection loop, built once; the menu ends with its prompt
+ACTION_MENU = (
+    f"\n{Fore.CYAN}Options:{Style.RESET_ALL}\n"
+    "  [1] Export CSV\n"
+    "  [2] Export JSON (full details)\n"
+    "  [3] Export Excel\n"
+    "  [4] Export Parquet (requires pyarrow)\n"
+    "  [Enter] Select different annotation types\n"
+    "  [q] Exit\n"
+    f"\n{Fore.CYAN}Select an option:{Style.RESET_ALL} "
+)
+EXPORT_CHOICES = ("1", "2", "3", "4")
+MSG_EXITING = f"{Fore.YELLOW}Exiting...{Style.RESET_ALL}\n"
+MSG_INVALID_CHOICE = f"{Fore.RED}Invalid choice. Continuing with type selection...{Style.RESET_ALL}\n"
+
+
+def ask(prompt):
+    """Show prompt and return the next stdin line; EOFError once stdin is exhausted."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip('\n')
+
 
 def main():
     """Main function for the Nobl9 Annotations Tool."""
@@ -651,8 +1052,15 @@ def main():
     
     try:
         check_dependencies()
+        
         context_name, credentials = enhanced_choose_context()
         
+        # Handshake with the selected instance in the background; authenticate reuses the connection
+        if credentials.get("is_custom_instance", False) and credentials.get("base_url"):
+            warm_up_connection(credentials["base_url"])
+        else:
+            warm_up_connection("https://app.nobl9.com/")
+        
         token, org = authenticate(credentials)
         if not token or not org:
             print(f"{Fore.RED}ERROR: Authentication failed{Style.RESET_ALL}")
@@ -663,18 +1071,27 @@ def main():
         custom_base_url = credentials.get("base_url")
         
         # Select time period
-        start_time, end_time = select_time_period()
+        start_time, end_time, start_dt, end_dt = select_time_period()
         
         # Fetch annotations
+        refresh = "--refresh" in sys.argv[1:]
         annotations = fetch_annotations(token, org, start_time, end_time,
-                                     is_custom_instance, custom_base_url)
+                                     is_custom_instance, custom_base_url, refresh,
+                                     start_dt, end_dt)
         
         if not annotations:
             print(f"{Fore.YELLOW}No annotations found in the specified time range.{Style.RESET_ALL}")
             sys.exit(0)
         
-        # Analyze annotation types
-        type_counts = analyze_annotation_types(annotations)
+        # Group by type once; every selection below reads only the chosen buckets
+        buckets = bucket_annotation_types(annotations)
+        type_counts = analyze_annotation_types(buckets)
+        
+        # Flatten once; display and every export reuse these rows
+        rows = build_rows(annotations)
+        
+        # Filtered results per type selection, least recently used first
+        filter_cache = OrderedDict()
         
         # Main loop for annotation type selection and export
         while True:
@@ -682,44 +1099,28 @@ def main():
             selected_types = select_annotation_types(type_counts)
             
             # Display filtered annotations
-            filtered_annotations = display_annotations(annotations, selected_types)
+            filtered_annotations, filtered_rows = display_annotations(
+                *filter_annotations(annotations, rows, buckets, selected_types, filter_cache),
+                selected_types)
             
             if not filtered_annotations:
                 print(f"{Fore.YELLOW}No annotations found for selected types.{Style.RESET_ALL}")
                 continue
             
-            # Export options
-            print(f"\n{Fore.CYAN}Export options:{Style.RESET_ALL}")
-            print("  [1] CSV")
-            print("  [2] JSON (full details)")
-            print("  [3] Excel")
-            print("  [Enter] Skip export")
-            
-            try:
-                choice = input(f"\n{Fore.CYAN}Select export format:{Style.RESET_ALL} ").strip()
-                if choice in ["1", "2", "3"]:
-                    export_annotations(filtered_annotations, context_name, choice)
-            except KeyboardInterrupt:
-                print(f"\n{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
-                sys.exit(0)
+            # One prompt per pass: export (then continue), continue, or exit
+            choice = ask(ACTION_MENU).strip().lower()
             
-            # Ask if user wants to continue or exit
-            print(f"\n{Fore.CYAN}Options:{Style.RESET_ALL}")
-            print("  [1] Select different annotation types")
-            print("  [2] Exit")
+            if choice in EXPORT_CHOICES:
+                export_annotations(filtered_annotations, filtered_rows, context_name, choice,
+                                   total=len(annotations), selected_types=selected_types)
+            elif choice == "q":
+                sys.stdout.write(MSG_EXITING)
+                break
+            elif choice:
+                sys.stdout.write(MSG_INVALID_CHOICE)
             
-            try:
-                continue_choice = input(f"{Fore.CYAN}Enter choice:{Style.RESET_ALL} ").strip()
-                if continue_choice == "2":
-                    print(f"{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
-                    break
-                elif continue_choice != "1":
-                    print(f"{Fore.RED}Invalid choice. Continuing with type selection...{Style.RESET_ALL}")
-            except KeyboardInterrupt:
-                print(f"\n{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
-                sys.exit(0)
-            
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
+        # Ctrl-C, or stdin closing (e.g. piped input ran out), ends the session cleanly
         print(f"\n{Fore.YELLOW}Exiting...{Style.RESET_ALL}")
         sys.exit(0)
     except Exception as e: